@@ -1,19 +1,35 @@
 import argparse
+import calendar
 import csv
+import gzip
+import io
 import json
+import lzma
 import os
+import re
 import unicodedata
+import zipfile
 import configparser
+from array import array
 from collections import defaultdict
-from datetime import datetime
+from datetime import datetime, timedelta
 from xml.etree.cElementTree import iterparse
 from dateutil import parser as date_parser
 
+try:
+    import zstandard
+except ImportError:  # Optional, only needed for .zst files
+    zstandard = None
+
+#: Compression levels used when writing, by file extension. These favor
+#: speed over size, so compressing exports costs little over writing them
+COMPRESSION_LEVELS = {'gz': 1, 'xz': 1, 'zst': 3}
+
 
 class MessageArchive:
     def __init__(self, archive_path, my_uid=None, my_name=None,
                  my_aliases=None, replacement_names=None, encoding='utf-8',
-                 sanitize_xml=False):
+                 sanitize_xml=False, thread_filter=None):
         """Init MessageArchive
         
         :param archive_path: Path to *messages.htm* file
@@ -36,10 +52,15 @@ class MessageArchive:
         :param encoding: File encoding (default: *UTF-8*)
         :param sanitize_xml: *True* to 'sanitize' the archive file, *False* to 
             leave as-is. (Default: *False*).
+        :param thread_filter: A ``ThreadFilter`` applied while parsing. 
+            Threads and messages it rejects are never built.
         """
         self.archive_path = archive_path  #: Path to archive file
         self.encoding = encoding  #: Encoding to use for all files
+        #: ``ThreadFilter`` applied while parsing, if any
+        self.thread_filter = thread_filter
         self._threads = None
+        self._stats = None
         self._backup_archive = None  #: Path to backup archive, if sanitized
 
         if replacement_names is None:
@@ -97,9 +118,15 @@ class MessageArchive:
         however, they're also substantially slower than 
         ``xml.etree.cElementTree.iterparse`` on large files.
         
+        Compressed archives can't be sanitized in place.
+        
         :return: Path to the backup archive
         """
         original_path = self.archive_path
+        extension = original_path.rsplit('.', 1)[-1].lower()
+        if extension == 'zip' or extension in COMPRESSION_LEVELS:
+            raise ValueError("Can't sanitize a compressed archive, extract "
+                             "messages.htm first: {}".format(original_path))
         tmp_path = "{}.tmp".format(original_path)
         bak_path = "{}.bak".format(original_path)
 
@@ -131,6 +158,7 @@ class MessageArchive:
         :return: List of threads
         """
         self._threads = None
+        self._stats = None
         return self.threads
 
     @property
@@ -154,24 +182,112 @@ class MessageArchive:
             <p>[actual message content]</p>
             </div>
         
+        If a *thread_filter* was provided, each thread's title is checked 
+        against it before any of its messages are read, and messages outside 
+        its date range are skipped before their timestamps are parsed.
+        
         :return: List of threads
         """
-        if self._threads:
+        if self._threads is not None:
             return self._threads
 
         # Read in threads 'as-is'
-        self._threads = []
-        for event, elem in iterparse(self.archive_path):
-            if elem.get('class') == 'thread':
-                fb_thread = Thread(elem)
-                self._threads.append(fb_thread)
+        self._threads = list(self._iter_threads())
         # Reformat (replace names, aliases, UIDs, etc)
         self._reformat_threads()
         # After replacing names, merge threads containing the same people
         self._merge_threads()
+        # Message counts are only final once threads have been merged
+        if self.thread_filter is not None:
+            self._threads = [t for t in self._threads
+                             if self.thread_filter.match_thread(t)]
         self._threads = sorted(self._threads, key=lambda k: k.title)
         return self._threads
 
+    def stats(self):
+        """Aggregate statistics for the archive.
+        
+        If threads have already been parsed, they're counted as-is. 
+        Otherwise, the archive is read in a single pass, with each thread 
+        counted and then discarded, so the full list of messages is never 
+        held in memory. Either way, the result is cached until ``reparse()``.
+        
+        :return: ``MessageStats``
+        """
+        if self._stats is not None:
+            return self._stats
+
+        min_messages = None
+        if self.thread_filter is not None:
+            min_messages = self.thread_filter.min_messages
+        stats = MessageStats(min_messages=min_messages)
+
+        if self._threads is not None:
+            for thread in self._threads:
+                stats.add(thread)
+        else:
+            to_replace = self._replacement_map()
+            for thread in self._iter_threads():
+                self._reformat_thread(thread, to_replace)
+                stats.add(thread)
+        self._stats = stats
+        return self._stats
+
+    def _iter_threads(self):
+        """Read threads 'as-is' from the archive, applying *thread_filter*
+        
+        :return: Generator of threads, in archive order
+        """
+        thread_filter = self.thread_filter
+        to_replace = self._replacement_map()
+
+        with self._open_archive() as archive_file:
+            for event, elem in iterparse(archive_file):
+                if elem.get('class') == 'thread':
+                    # The title is the thread's own text, so participants
+                    # can be checked before building anything
+                    if thread_filter is None or thread_filter.match_title(
+                            [to_replace.get(name, name)
+                             for name in (elem.text or '').split(', ')]):
+                        fb_thread = Thread(elem, thread_filter)
+                        # Date filters may have left nothing behind
+                        if thread_filter is None or fb_thread.messages:
+                            yield fb_thread
+                    # Everything needed has been copied out of the tree
+                    elem.clear()
+
+    def _open_archive(self):
+        """Open the archive file for reading, as bytes.
+        
+        *.gz*, *.xz* and *.zst* files are decompressed as they're read. For 
+        a *.zip* (like the download from Facebook), *messages.htm* is read 
+        straight out of it.
+        
+        :return: File object
+        """
+        if self.archive_path.lower().endswith('.zip'):
+            # The opened member keeps the zip file open until it's closed
+            with zipfile.ZipFile(self.archive_path) as zip_file:
+                return zip_file.open(self.__zip_member(zip_file))
+        return _open(self.archive_path, 'rb')
+
+    @staticmethod
+    def __zip_member(zip_file):
+        """Find *messages.htm* in a zip file, preferring *html/messages.htm*
+        
+        :param zip_file: ``zipfile.ZipFile``
+        :return: Name of the *messages.htm* member
+        """
+        names = [n for n in zip_file.namelist()
+                 if n.rsplit('/', 1)[-1] == 'messages.htm']
+        for name in names:
+            if name.endswith('html/messages.htm'):
+                return name
+        if names:
+            return names[0]
+        raise FileNotFoundError("Couldn't find messages.htm in zip "
+                                "file: {}".format(zip_file.filename))
+
     def _merge_threads(self):
         """Merges multiple threads with the same participants into one thread.
         
@@ -219,50 +335,68 @@ class MessageArchive:
         
         :return: 
         """
-        # Reverse replacements so each name we want to replace is a key,
-        # and its replacement the value
+        to_replace = self._replacement_map()
+        for thread in self.threads:
+            self._reformat_thread(thread, to_replace)
+
+    def _reformat_thread(self, thread, to_replace):
+        """Reformat a single thread (see *_reformat_threads()*)
+        
+        :param thread: ``Thread`` to reformat in place
+        :param to_replace: dict of names to their replacements
+        :return: 
+        """
+        # Split thread title for participants (sometimes there's only one...)
+        if ', ' in thread.title:
+            title_names = thread.title.split(', ')
+        else:
+            title_names = [thread.title]
+
+        # Replace names in titles, while deleting our own
+        my_names = self.my_aliases + [self.my_name]
+        for index, person in enumerate(title_names):
+            if person in to_replace:
+                title_names[index] = to_replace[person]
+            # Check length for the rare occurrence that someone has
+            # sent themselves a message
+            if title_names[index] in my_names and len(title_names) > 1:
+                del title_names[index]
+        title_names = list(set(title_names))
+
+        # Reset to new title
+        if len(title_names) == 1:
+            thread.title = title_names[0]
+        elif len(title_names) > 1:
+            thread.title = ','.join(title_names)
+        else:
+            raise ValueError("Ran out of names?")
+
+        # Replace names in thread messages
+        for msg in thread.messages:
+            if msg.user in to_replace:
+                msg.user = to_replace[msg.user]
+
+    def _replacement_map(self):
+        """Reverse *replacement_names* so each name we want to replace is 
+        a key, and its replacement the value
+        
+        :return: dict of names to their replacements
+        """
         to_replace = {}
         for key, val in self.replacement_names.items():
             for v in val:
                 to_replace[v] = key
+        return to_replace
 
-        # Split thread title for participants (sometimes there's only one...)
-        for thread in self.threads:
-            if ', ' in thread.title:
-                title_names = thread.title.split(', ')
-            else:
-                title_names = [thread.title]
-
-            # Replace names in titles, while deleting our own
-            my_names = self.my_aliases + [self.my_name]
-            for index, person in enumerate(title_names):
-                if person in to_replace:
-                    title_names[index] = to_replace[person]
-                # Check length for the rare occurrence that someone has
-                # sent themselves a message
-                if title_names[index] in my_names and len(title_names) > 1:
-                    del title_names[index]
-            title_names = list(set(title_names))
-
-            # Reset to new title
-            if len(title_names) == 1:
-                thread.title = title_names[0]
-            elif len(title_names) > 1:
-                thread.title = ','.join(title_names)
-            else:
-                raise ValueError("Ran out of names?")
-
-            # Replace names in thread messages
-            for msg in thread.messages:
-                if msg.user in to_replace:
-                    msg.user = to_replace[msg.user]
-
-    def write(self, directory='fbparser_out', export_format='csv'):
+    def write(self, directory='fbparser_out', export_format='csv',
+              compression=None):
         """Write all threads to *directory* in either CSV, TXT, or JSON format.
         
         :param directory: Directory to output files. Will be created if it 
             doesn't exist.
         :param export_format: CSV, TXT, or JSON
+        :param compression: *gz*, *xz* or *zst* to compress each file as 
+            it's written, or *None* (default) for none
         :return: 
         """
         if not os.path.exists(directory):
@@ -271,16 +405,20 @@ class MessageArchive:
         export_format = export_format.upper()
         if export_format not in ['CSV', 'TXT', 'JSON']:
             raise ValueError("Unsupported export format")
+        if compression is not None and compression not in COMPRESSION_LEVELS:
+            raise ValueError("Unsupported compression")
+        # Fail before parsing, rather than at the first file written
+        _require_compression(compression)
 
         for t in self.threads:
             if self.my_name in t.participants:
                 t.participants = t.participants.remove(self.my_name)
             if export_format == 'CSV':
-                t.export_csv(directory=directory)
+                t.export_csv(directory=directory, compression=compression)
             elif export_format == 'TXT':
-                t.export_txt(directory=directory)
+                t.export_txt(directory=directory, compression=compression)
             elif export_format == 'JSON':
-                t.export_json(directory=directory)
+                t.export_json(directory=directory, compression=compression)
 
     @staticmethod
     def _metadata(message_tree):
@@ -314,30 +452,295 @@ class MessageArchive:
         return message_text
 
 
+class ThreadFilter:
+    """Criteria for selecting threads while the archive is parsed.
+    
+    Checks are made as early as possible: participants against the raw 
+    thread title, and dates against the year in the archive's timestamp 
+    string, so threads and messages that can't match are discarded before 
+    they're built.
+    """
+    #: Finds the year in timestamps like
+    #: ``Monday, August 10, 2015 at 10:40pm EDT``
+    year_pattern = re.compile(r'\b(\d{4})\b')
+
+    def __init__(self, participants=None, since=None, until=None,
+                 min_messages=None):
+        """Init ThreadFilter
+        
+        :param participants: A list of names. Only threads including at 
+            least one of them are kept. Names are compared (ignoring case) 
+            after any replacements have been made.
+        :param since: ``datetime`` of the earliest message to keep
+        :param until: ``datetime`` of the latest message to keep. Inclusive, 
+            so a whole day needs to be passed as its last moment (ex: 
+            ``datetime(2015, 6, 30, 23, 59, 59, 999999)``)
+        :param min_messages: Minimum number of messages a thread must have, 
+            once threads with the same participants have been merged
+        """
+        #: Names, at least one of which must be in the thread
+        self.participants = None
+        if participants:
+            self.participants = set(p.casefold() for p in participants)
+        self.since = self.__naive(since)  #: Earliest message timestamp
+        self.until = self.__naive(until)  #: Latest message timestamp
+        #: Minimum number of messages in a (merged) thread
+        self.min_messages = min_messages
+
+    def match_title(self, names):
+        """Check the names in a thread title against *participants*
+        
+        :param names: List of names in the thread title
+        :return: *True* if the thread should be parsed
+        """
+        if self.participants is None:
+            return True
+        return not self.participants.isdisjoint(n.casefold() for n in names)
+
+    def before_range(self, message):
+        """Returns *True* if *message* is older than *since*"""
+        return self.since is not None and self.__compare(message,
+                                                         self.since) < 0
+
+    def after_range(self, message):
+        """Returns *True* if *message* is newer than *until*"""
+        return self.until is not None and self.__compare(message,
+                                                         self.until) > 0
+
+    def match_thread(self, thread):
+        """Check a fully parsed (and merged) thread
+        
+        :param thread: ``Thread``
+        :return: *True* if the thread should be kept
+        """
+        if not thread.messages:
+            return False
+        if self.min_messages is not None:
+            return len(thread.messages) >= self.min_messages
+        return True
+
+    def __compare(self, message, bound):
+        """Compare a message's timestamp to *bound*.
+        
+        The year is read from the original timestamp string first, so the 
+        full timestamp is only parsed when it shares a year with *bound*.
+        
+        :param message: ``_Message``
+        :param bound: ``datetime`` to compare against
+        :return: -1, 0 or 1 if *message* is before, at or after *bound*
+        """
+        match = None
+        if message.original_timestamp is not None:
+            match = self.year_pattern.search(message.original_timestamp)
+        if match is not None:
+            year = int(match.group(1))
+            if year != bound.year:
+                return -1 if year < bound.year else 1
+        timestamp = self.__naive(message.timestamp)
+        return (timestamp > bound) - (timestamp < bound)
+
+    @staticmethod
+    def __naive(timestamp):
+        """Drop any timezone, as the archive's abbreviations (EDT, PST...) 
+        usually can't be resolved and aware/naive datetimes can't be compared
+        
+        :param timestamp: ``datetime`` or *None*
+        :return: Naive ``datetime`` or *None*
+        """
+        if timestamp is None:
+            return None
+        return timestamp.replace(tzinfo=None)
+
+
+class MessageStats:
+    """Aggregate statistics, counted one thread at a time.
+    
+    Senders are numbered as they're found, with their counts and first/last 
+    timestamps kept in arrays indexed by that number. Only a message count 
+    is kept per thread title, so pieces of a thread are combined the same 
+    way ``MessageArchive`` merges them. If *min_messages* is set, a title's 
+    counts are held back (sparsely) until every thread has been seen, and 
+    only added to the totals if it has enough messages.
+    """
+    #: Timestamps are stored as seconds since this (naive) datetime
+    epoch = datetime(1970, 1, 1)
+
+    def __init__(self, min_messages=None):
+        """Init MessageStats
+        
+        :param min_messages: Leave out threads with fewer messages than this
+        """
+        #: Minimum number of messages for a thread to be counted
+        self.min_messages = min_messages
+        self._senders = {}  #: Sender names, mapped to their array index
+        self._threads = {}  #: Thread titles, mapped to their counters
+        self._sent = array('L')  #: Messages by sender index
+        self._first = array('d')  #: Earliest message by sender index
+        self._last = array('d')  #: Latest message by sender index
+        self._hours = array('L', [0] * 24)  #: Messages by hour of day
+        self._days = array('L', [0] * 7)  #: Messages by weekday (Monday=0)
+
+    def add(self, thread):
+        """Count a thread's messages. The thread isn't retained.
+        
+        :param thread: ``Thread``, with names already replaced
+        :return: 
+        """
+        counters = self._threads.get(thread.title)
+        if counters is None:
+            counters = self._threads[thread.title] = _ThreadStats()
+        # Without a minimum, every message counts towards the totals
+        # straight away, and titles only need their message count
+        held = counters if self.min_messages is not None else None
+        for m in thread.messages:
+            sender = self._senders.get(m.user)
+            if sender is None:
+                sender = self._senders[m.user] = len(self._senders)
+                self._sent.append(0)
+                self._first.append(float('inf'))
+                self._last.append(float('-inf'))
+            timestamp = m.timestamp.replace(tzinfo=None)
+            seconds = (timestamp - self.epoch).total_seconds()
+            counters.messages += 1
+            if held is not None:
+                held.add(sender, timestamp, seconds)
+                continue
+            self._hours[timestamp.hour] += 1
+            self._days[timestamp.weekday()] += 1
+            self._sent[sender] += 1
+            if seconds < self._first[sender]:
+                self._first[sender] = seconds
+            if seconds > self._last[sender]:
+                self._last[sender] = seconds
+
+    def export_json(self, path, encoding='utf-8'):
+        """Export statistics to JSON
+        
+        :param path: Output file path. Compressed if it ends in *.gz*, *.xz* 
+            or *.zst*
+        :param encoding: Encoding (default: *UTF-8*)
+        :return: 
+        """
+        with _open(path, 'wt', encoding=encoding) as json_file:
+            json_file.write(self.json())
+
+    def json(self):
+        """JSON string representing these statistics
+        
+        :return: JSON str
+        """
+        return json.dumps(self.__dict__(), indent=4, sort_keys=True)
+
+    def __timestamp(self, seconds):
+        """Format seconds since *epoch* like message timestamps"""
+        return datetime.strftime(
+            self.epoch + timedelta(seconds=seconds),
+            _Message.timestamp_format
+        )
+
+    def __dict__(self):
+        """dict representing the statistics"""
+        threads = {
+            title: counters for title, counters in self._threads.items()
+            if self.min_messages is None
+            or counters.messages >= self.min_messages
+        }
+
+        # Add any held back counts to copies of the totals, so they're
+        # only counted once however many times this is called
+        hours = array('L', self._hours)
+        days = array('L', self._days)
+        sent = array('L', self._sent)
+        first = array('d', self._first)
+        last = array('d', self._last)
+        for counters in threads.values():
+            for (day, hour), count in counters.times.items():
+                hours[hour] += count
+                days[day] += count
+            for sender, (count, earliest, latest) in counters.senders.items():
+                sent[sender] += count
+                first[sender] = min(first[sender], earliest)
+                last[sender] = max(last[sender], latest)
+
+        participants = {}
+        for name, sender in self._senders.items():
+            if sent[sender]:
+                participants[name] = {
+                    'messages': sent[sender],
+                    'first': self.__timestamp(first[sender]),
+                    'last': self.__timestamp(last[sender])
+                }
+        return {
+            'messages': sum(sent),
+            'threads': {t: c.messages for t, c in threads.items()},
+            'participants': participants,
+            'hours': {'{:02d}'.format(h): c for h, c in enumerate(hours)},
+            'days': {calendar.day_name[d]: c for d, c in enumerate(days)}
+        }
+
+
+class _ThreadStats:
+    """Counters for a single (merged) thread. Per-sender and per-time counts 
+    are only kept while they're held back for ``MessageStats.min_messages``, 
+    and only for senders/times actually seen in the thread."""
+    def __init__(self):
+        self.messages = 0  #: Number of messages
+        #: Sender index, mapped to [messages, earliest, latest]
+        self.senders = {}
+        #: (weekday, hour), mapped to number of messages
+        self.times = {}
+
+    def add(self, sender, timestamp, seconds):
+        """Hold back a message's counts
+        
+        :param sender: Sender index
+        :param timestamp: Naive ``datetime`` of the message
+        :param seconds: *timestamp* as seconds since ``MessageStats.epoch``
+        :return: 
+        """
+        key = (timestamp.weekday(), timestamp.hour)
+        self.times[key] = self.times.get(key, 0) + 1
+        counts = self.senders.get(sender)
+        if counts is None:
+            self.senders[sender] = [1, seconds, seconds]
+        else:
+            counts[0] += 1
+            if seconds < counts[1]:
+                counts[1] = seconds
+            if seconds > counts[2]:
+                counts[2] = seconds
+
+
 class Thread:
     """Thread of messages"""
-    def __init__(self, xml_tree=None):
+    def __init__(self, xml_tree=None, thread_filter=None):
         """
         
         :param xml_tree: XML tree to parse
+        :param thread_filter: ``ThreadFilter`` whose date range messages 
+            must fall in
         """
         self.title = None
         self._participants = None
         self._messages = []
+        self._filter = thread_filter
 
         if xml_tree is not None:
             self.title = xml_tree.text
             self.messages = xml_tree
 
-    def export_csv(self, directory=None, encoding='utf-8'):
+    def export_csv(self, directory=None, encoding='utf-8',
+                   compression=None):
         """Export thread to CSV
         
         :param directory: Output directory
         :param encoding: Encoding (default: *UTF-8*)
+        :param compression: *gz*, *xz* or *zst* to compress the file, or 
+            *None* (default)
         :return:  
         """
-        path = self.__file_path('csv', directory)
-        with open(path, self.__mode(path), encoding=encoding) as csv_file:
+        path = self.__file_path('csv', directory, compression)
+        with _open(path, self.__mode(path), encoding=encoding) as csv_file:
             # lineterminator='\n' avoids Windows skipping every other row
             cwriter = csv.writer(
                 csv_file,
@@ -349,32 +752,38 @@ class Thread:
             for m in self.messages:
                 cwriter.writerow([m.timestamp, m.user, m.text])
 
-    def export_txt(self, directory=None, encoding='utf-8'):
+    def export_txt(self, directory=None, encoding='utf-8',
+                   compression=None):
         """Export thread to TXT
         
         :param directory: Output directory
         :param encoding: Encoding (default: *UTF-8*)
+        :param compression: *gz*, *xz* or *zst* to compress the file, or 
+            *None* (default)
         :return: 
         """
-        path = self.__file_path('txt', directory)
+        path = self.__file_path('txt', directory, compression)
         header = "Thread: {}\nParticipants: {}\n{}"
         border = ''.join(["-" for _ in range(0, 80)])
-        with open(path, self.__mode(path), encoding=encoding) as txt_file:
+        with _open(path, self.__mode(path), encoding=encoding) as txt_file:
             txt_file.write(
                 header.format(self.title, ', '.join(self.participants), border)
             )
             for m in self.messages:
                 txt_file.write(str(m) + "\n")
 
-    def export_json(self, directory=None, encoding='utf-8'):
+    def export_json(self, directory=None, encoding='utf-8',
+                    compression=None):
         """Export thread to JSON
         
         :param directory: Output directory
         :param encoding: Encoding (default: *UTF-8*)
+        :param compression: *gz*, *xz* or *zst* to compress the file, or 
+            *None* (default)
         :return: 
         """
-        path = self.__file_path('json', directory)
-        with open(path, self.__mode(path), encoding=encoding) as json_file:
+        path = self.__file_path('json', directory, compression)
+        with _open(path, self.__mode(path), encoding=encoding) as json_file:
             json_file.write(self.json())
 
     def export_stdout(self):
@@ -400,22 +809,27 @@ class Thread:
         """Determine write mode. If file exists, will be appended
         
         :param path: Path to file
-        :return: 'a' (append) if file exists, 'w' if not
+        :return: 'at' (append) if file exists, 'wt' if not
         """
         if os.path.exists(path):
-            return 'a'
+            return 'at'
         else:
-            return 'w'
+            return 'wt'
 
-    def __file_path(self, extension, directory=None):
+    def __file_path(self, extension, directory=None, compression=None):
         """Generate file path+file name
         
         :param extension: Extension to use (csv, txt, json...)
         :param directory: Output directory
+        :param compression: Compression extension to add (gz, xz, zst), if any
         :return: Full path to file
         """
         if not directory:
             directory = os.getcwd()
+        if compression is not None:
+            if compression not in COMPRESSION_LEVELS:
+                raise ValueError("Unsupported compression")
+            extension = "{}.{}".format(extension, compression)
         file_name = "{}.{}".format(self.title[:100], extension)
         return os.path.join(directory, file_name)
 
@@ -457,7 +871,14 @@ class Thread:
             # Need to check for completeness, as the actual message text is
             # found immediately outside the div block.
             if message.complete:
-                self._messages.append(message)
+                if (self._filter is not None
+                        and self._filter.before_range(message)):
+                    # Messages are archived newest-first, so the rest of
+                    # this thread is older still
+                    break
+                if (self._filter is None
+                        or not self._filter.after_range(message)):
+                    self._messages.append(message)
                 message = _Message()
         # Facebook archives messages as most-to-least recent, which is
         # pretty annoying to read. Reverse them so they're old-to-new...
@@ -496,7 +917,7 @@ class _Message:
 
     def __init__(self):
         self.user = None  #: User display name or UID (sender)
-        self.timestamp = None  #: Message timestamp
+        self._timestamp = None  #: Message timestamp
         self._text = None  #: Message text/body
         self.original_timestamp = None  #: Long-form timestamp from archive
 
@@ -505,10 +926,23 @@ class _Message:
         """Returns *True* if all data needed is accounted for"""
         return (
             self.user is not None
-            and self.timestamp is not None
+            and (self._timestamp is not None
+                 or self.original_timestamp is not None)
             and self._text is not None
         )
 
+    @property
+    def timestamp(self):
+        """Message timestamp. Parsed from *original_timestamp* on first 
+        access, so messages that are filtered out are never parsed."""
+        if self._timestamp is None and self.original_timestamp is not None:
+            self._timestamp = date_parser.parse(self.original_timestamp)
+        return self._timestamp
+
+    @timestamp.setter
+    def timestamp(self, timestamp):
+        self._timestamp = timestamp
+
     @property
     def metadata(self):
         """Message metadata (sending user and timestamp)"""
@@ -522,9 +956,9 @@ class _Message:
                     if n.get('class') == 'user':
                         self.user = n.text
                     elif n.get('class') == 'meta':
-                        # Retain original timestamp, but parse into datetime
+                        # Retain original timestamp; it's parsed into a
+                        # datetime when *timestamp* is first read
                         self.original_timestamp = n.text
-                        self.timestamp = date_parser.parse(n.text)
 
     @property
     def text(self):
@@ -566,6 +1000,71 @@ class _Message:
         return "[{:16}] {}: {}".format(ts, self.user, self.text)
 
 
+def _require_compression(extension):
+    """Check that the package needed for a compression format is installed
+    
+    :param extension: Compression extension (gz, xz, zst), or *None*
+    :return: 
+    """
+    if extension == 'zst' and zstandard is None:
+        raise ImportError("zstandard is required for .zst files: "
+                          "pip install fbparser[zstd]")
+
+
+def _open(path, mode='rb', encoding=None):
+    """Open a file, compressing/decompressing it as it's written/read if 
+    its extension is *.gz*, *.xz* or *.zst*
+    
+    :param path: Path to file
+    :param mode: Mode, as with ``open()``
+    :param encoding: Encoding, for text modes
+    :return: File object
+    """
+    extension = path.rsplit('.', 1)[-1].lower()
+    writing = any(c in mode for c in 'wax')
+    if extension == 'gz':
+        return gzip.open(path, mode, encoding=encoding,
+                         compresslevel=COMPRESSION_LEVELS['gz'])
+    elif extension == 'xz':
+        # lzma only accepts a preset when writing
+        preset = COMPRESSION_LEVELS['xz'] if writing else None
+        return lzma.open(path, mode, encoding=encoding, preset=preset)
+    elif extension == 'zst':
+        _require_compression(extension)
+        if writing:
+            cctx = zstandard.ZstdCompressor(level=COMPRESSION_LEVELS['zst'])
+            return zstandard.open(path, mode, cctx=cctx, encoding=encoding)
+        # Appending to an export adds a frame, so read across all of them
+        reader = zstandard.ZstdDecompressor().stream_reader(
+            open(path, 'rb'),
+            read_across_frames=True,
+            closefd=True
+        )
+        if 't' in mode:
+            return io.TextIOWrapper(reader, encoding=encoding)
+        return reader
+    return open(path, mode, encoding=encoding)
+
+
+def _parse_bound(text, end):
+    """Parse a *--since*/*--until* date. Anything left out is filled in 
+    from the start or end of the period given, so ``2015-06`` means the 
+    first or last moment of June 2015, rather than a day in it.
+    
+    :param text: Date/time string, or *None*
+    :param end: *True* to fill in the end of the period, *False* the start
+    :return: ``datetime``, or *None* if *text* is empty
+    """
+    if not text:
+        return None
+    if end:
+        # Days past the end of the month are clamped to its last day
+        default = datetime(1, 12, 31, 23, 59, 59, 999999)
+    else:
+        default = datetime(1, 1, 1)
+    return date_parser.parse(text, default=default)
+
+
 def replacements(file_path):
     """Open file containing names to replace
     
@@ -602,7 +1101,10 @@ def main():
     prog = "FBParser"
     description = "Convert Facebook message archive"
     parser = argparse.ArgumentParser(prog=prog, description=description)
-    parser.add_argument(dest='input', help="messages.htm file")
+    parser.add_argument(
+        dest='input',
+        help="messages.htm file (may be .gz, .xz or .zst), or the archive .zip"
+    )
     parser.add_argument('--csv', action='store_true', help="Export to CSV")
     parser.add_argument('--text', action='store_true', help="Export to TXT")
     parser.add_argument('--json', action='store_true', help="Export to JSON")
@@ -641,6 +1143,39 @@ def main():
         action='store_true',
         help="Strip invalid characters (creates backup of original archive)"
     )
+    parser.add_argument(
+        '--participant',
+        action='append',
+        default=None,
+        help="Only threads including this person (may be repeated)"
+    )
+    parser.add_argument(
+        '--since',
+        default=None,
+        help="Only messages on or after this date/time"
+    )
+    parser.add_argument(
+        '--until',
+        default=None,
+        help="Only messages on or before this date/time"
+    )
+    parser.add_argument(
+        '--min-messages',
+        type=int,
+        default=None,
+        help="Only threads with at least this many messages"
+    )
+    parser.add_argument(
+        '--stats-out',
+        default=None,
+        help="Write message statistics to this JSON file"
+    )
+    parser.add_argument(
+        '--compress',
+        choices=sorted(COMPRESSION_LEVELS),
+        default=None,
+        help="Compress exported files (gz, xz or zst)"
+    )
     args = parser.parse_args()
     # Hard stop for missing input file
     if not os.path.exists(args.input):
@@ -651,6 +1186,22 @@ def main():
     if args.replace is not None:
         replacement_names = replacements(args.replace)
 
+    # Filters are applied while parsing, rather than to the parsed threads
+    thread_filter = None
+    if (args.participant or args.since or args.until
+            or args.min_messages is not None):
+        thread_filter = ThreadFilter(
+            participants=args.participant,
+            since=_parse_bound(args.since, end=False),
+            until=_parse_bound(args.until, end=True),
+            min_messages=args.min_messages
+        )
+
+    # Check compression support up front, rather than after parsing
+    _require_compression(args.compress)
+    if args.stats_out is not None:
+        _require_compression(args.stats_out.rsplit('.', 1)[-1].lower())
+
     # Start/read in threads
     msg_archive = MessageArchive(
         args.input,
@@ -658,20 +1209,25 @@ def main():
         args.name,
         replacement_names=replacement_names,
         encoding=args.encoding,
-        sanitize_xml=args.sanitize
+        sanitize_xml=args.sanitize,
+        thread_filter=thread_filter
     )
-    threads = msg_archive.threads
 
     # Start doing things
     if args.csv:
-        msg_archive.write(args.dir, 'csv')
+        msg_archive.write(args.dir, 'csv', compression=args.compress)
     if args.text:
-        msg_archive.write(args.dir, 'txt')
+        msg_archive.write(args.dir, 'txt', compression=args.compress)
     if args.json:
-        msg_archive.write(args.dir, 'json')
+        msg_archive.write(args.dir, 'json', compression=args.compress)
     if args.stdout:
-        for t in threads:
+        for t in msg_archive.threads:
             t.export_stdout()
+    # Reuses threads if they've been parsed above, otherwise counts
+    # them in a single pass without keeping them
+    if args.stats_out:
+        msg_archive.stats().export_json(args.stats_out,
+                                        encoding=args.encoding)
 
 
 if __name__ == '__main__':
@@ -24,7 +24,8 @@ setup(
     license="MIT",
     url="https://github.com/arcward/fbparser",
     packages=['fbparser'],
-    install_requires=['python-dateutil>=2.5.3'],
+    install_requires=['python-dateutil>=2.7.0'],
+    extras_require={'zstd': ['zstandard>=0.15.0']},
     entry_points = {
         'console_scripts': ['fbparser=fbparser.fbparser:command_line']
     }